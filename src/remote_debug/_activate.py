@@ -0,0 +1,109 @@
+"""Debugger activation for processes running on this node.
+
+This module only uses the standard library: `rdg attach` also runs its source as a
+script (`python -I -c <source> PID`) next to the target process, with the target's
+own interpreter, since sys.remote_exec (PEP 768, Python 3.14+) requires matching
+Python versions. The script prints "signalled" or "injected", or exits with an
+error message.
+"""
+
+import os
+import signal
+import sys
+
+
+def is_lite_mode_armed(pid):
+    """Check whether PID is an `rdg debug --lite` process with its handler installed.
+
+    Other programs (e.g., PyTorch Lightning's SLURM auto-requeue) install SIGUSR1
+    handlers of their own, so a handler alone doesn't mean the signal is rdg's
+    to send. Without any handler, SIGUSR1 would terminate the process.
+
+    Raises:
+        OSError: If the process doesn't exist or can't be inspected
+    """
+    with open(f"/proc/{pid}/status") as f:
+        sigcgt = next(int(line[7:], 16) for line in f if line.startswith("SigCgt:"))
+    # SigCgt is the hex mask of signals with a handler; signal N is bit N - 1
+    if not sigcgt >> (signal.SIGUSR1 - 1) & 1:
+        return False
+
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        args = os.fsdecode(f.read()).split("\0")
+    return _has_lite_flag(args)
+
+
+def _has_lite_flag(args):
+    """Check whether a command line runs `rdg debug` with --lite (or -l)."""
+    for i, arg in enumerate(args):
+        if os.path.basename(arg) not in ("rdg", "remote_debug.cli"):
+            continue
+        if args[i + 1 : i + 2] != ["debug"]:
+            continue
+        # Options end at the wrapped `python` command; short ones may be combined
+        for option in args[i + 2 :]:
+            if not option.startswith("-"):
+                break
+            if option == "--lite" or (not option.startswith("--") and "l" in option):
+                return True
+        return False
+    return False
+
+
+def inject(pid):
+    """Inject a script that starts the debugger into PID with sys.remote_exec.
+
+    The script deletes itself when it runs. It lives in this node's temp directory,
+    so one that is never run doesn't linger in the home directory.
+
+    Raises:
+        RuntimeError: If this interpreter has no sys.remote_exec
+        OSError: If the target can't be injected into
+    """
+    import tempfile
+
+    if not hasattr(sys, "remote_exec"):
+        raise RuntimeError(
+            f"injecting the debugger needs Python 3.14+, not {sys.version.split()[0]}"
+        )
+
+    fd, path = tempfile.mkstemp(prefix="rdg-attach-", suffix=".py")
+    with os.fdopen(fd, "w") as f:
+        f.write(
+            "import os\n"
+            f"os.remove({path!r})\n"
+            "import remote_debug\n"
+            "remote_debug.start_debugger(wait=True)\n"
+        )
+    try:
+        sys.remote_exec(pid, path)
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+def main(pid):
+    """Signal PID if it is armed by lite mode, and inject the debugger otherwise."""
+    try:
+        armed = is_lite_mode_armed(pid)
+    except OSError as e:
+        sys.exit(f"Cannot inspect process {pid}: {e}")
+
+    if armed:
+        # The signal interrupts sleeps and blocking calls right away
+        os.kill(pid, signal.SIGUSR1)
+        print("signalled")
+        return
+
+    try:
+        inject(pid)
+    except (OSError, RuntimeError) as e:
+        sys.exit(
+            f"Process {pid} is not armed by 'rdg debug --lite', "
+            f"and injecting the debugger failed: {e}"
+        )
+    print("injected")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]))
@@ -1,12 +1,6 @@
 """Public API for programmatic debugger control."""
 
-import socket
 import os
-import debugpy
-from rich.panel import Panel
-from rich.text import Text
-from rich.console import Console
-import io
 
 
 # Global state to track if debugger is already started
@@ -14,42 +8,118 @@ _debugger_started = False
 _debugger_port = None
 _debugger_host = None
 
+# Cached result of socket.gethostname(), populated on first use
+_hostname = None
+
+# Shared rich console, created on first use so importing this module stays cheap
+_console = None
+
 # Default port to try (unlikely to be in use)
 DEFAULT_DEBUG_PORT = 5679
 
+# Seconds to wait for the submit host's DNS lookup before using its short name
+FQDN_LOOKUP_TIMEOUT = 2.0
 
-def _is_port_free(port):
-    """Check if a port is available."""
-    try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(("", port))
-            return True
-    except OSError:
-        return False
+# Submit host FQDN lookups by short name, as (thread, result) pairs. The thread
+# appends the FQDN to the result list once DNS answers.
+_fqdn_lookups = {}
 
 
 def _find_free_port():
-    """Find an available port, preferring the default."""
-    # Try default port first
-    if _is_port_free(DEFAULT_DEBUG_PORT):
-        return DEFAULT_DEBUG_PORT
+    """Find an available port, preferring the default.
+
+    The default port is probed the way debugpy.listen will use it: bound with
+    SO_REUSEADDR (so a port lingering in TIME_WAIT still counts as free) and
+    then put into listening state.
+    """
+    import socket
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(("", DEFAULT_DEBUG_PORT))
+            s.listen(1)
+            return DEFAULT_DEBUG_PORT
+        except OSError:
+            pass
 
-    # Fall back to finding any free port
+    # Fall back to letting the OS pick any free port
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.bind(("", 0))
         return s.getsockname()[1]
 
 
+def _get_hostname():
+    """Return this machine's hostname, querying it only once per process."""
+    global _hostname
+    if _hostname is None:
+        import socket
+
+        _hostname = socket.gethostname()
+    return _hostname
+
+
+def _get_console():
+    """Return the shared rich console that writes straight to stdout."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+def _cached_getfqdn(short_host):
+    """Resolve the FQDN of a host, caching the (potentially slow) DNS lookup.
+
+    Lookups that take longer than FQDN_LOOKUP_TIMEOUT fall back to the short name
+    without caching it: the lookup keeps running in the background, and later
+    calls use its result once it is there.
+    """
+    import socket
+    import threading
+
+    # When running on the host itself, $HOSTNAME may already be the FQDN
+    env_hostname = os.environ.get("HOSTNAME", "")
+    if env_hostname.startswith(short_host + "."):
+        return env_hostname
+
+    # getfqdn() has no timeout of its own, so run it in a daemon thread that can
+    # be abandoned if DNS hangs
+    lookup = _fqdn_lookups.get(short_host)
+    if lookup is None or not (lookup[1] or lookup[0].is_alive()):
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(socket.getfqdn(short_host)), daemon=True
+        )
+        thread.start()
+        lookup = _fqdn_lookups[short_host] = (thread, result)
+
+    thread, result = lookup
+    thread.join(FQDN_LOOKUP_TIMEOUT)
+    if not result:
+        return short_host
+
+    fqdn = result[0]
+    # Fix for cases where getfqdn returns a doubled hostname (e.g., host.host.domain.com)
+    prefix = short_host + "."
+    if fqdn.startswith(prefix + prefix):
+        fqdn = fqdn[len(prefix) :]
+    return fqdn
+
+
 def _get_ssh_command(compute_node, remote_port, local_port=5678):
     """Build SSH tunnel command string."""
+    import socket
+
     user = os.environ.get("SLURM_JOB_USER") or os.environ.get("USER")
     submit_host_short = os.environ.get("SLURM_SUBMIT_HOST")
 
     if user and submit_host_short:
         try:
-            submit_host_fqdn = socket.getfqdn(submit_host_short)
-            if submit_host_fqdn.startswith(submit_host_short + "." + submit_host_short):
-                submit_host_fqdn = submit_host_fqdn[len(submit_host_short) + 1 :]
+            submit_host_fqdn = os.environ.get("REMOTE_DEBUG_FQDN") or _cached_getfqdn(
+                submit_host_short
+            )
             login_host = f"{user}@{submit_host_fqdn}"
         except socket.gaierror:
             login_host = f"{user}@{submit_host_short}"
@@ -83,6 +153,11 @@ def start_debugger(wait=True):
         >>> # ... do some work ...
         >>> rdg.pause()  # Pause here when ready
     """
+    import concurrent.futures
+    import debugpy
+    from rich.panel import Panel
+    from rich.text import Text
+
     global _debugger_started, _debugger_port, _debugger_host
 
     if _debugger_started:
@@ -97,7 +172,7 @@ def start_debugger(wait=True):
 
     # Find an open port
     port = _find_free_port()
-    hostname = socket.gethostname()
+    hostname = _get_hostname()
     remote_path = os.getcwd()
 
     # Store global state
@@ -105,8 +180,16 @@ def start_debugger(wait=True):
     _debugger_port = port
     _debugger_host = hostname
 
+    # Build the SSH tunnel command, which may need a slow DNS lookup, in the
+    # background while the banner is printed and debugpy starts its adapter
+    default_local_port = 5679
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    ssh_command_future = executor.submit(
+        _get_ssh_command, hostname, port, default_local_port
+    )
+    executor.shutdown(wait=False)
+
     # Print connection info
-    console = Console(file=io.StringIO())
     info_text = Text(justify="left")
     info_text.append("Node:        ", style="bold")
     info_text.append(hostname, style="cyan")
@@ -121,22 +204,22 @@ def start_debugger(wait=True):
         border_style="blue",
         expand=False,
     )
-    console.print(panel)
-    output = console.file.getvalue()
-    print(output, flush=True)
+    _get_console().print(panel)
 
     # Start listening
     debugpy.listen(("0.0.0.0", port))
     print(f"[DEBUGGER] Listening on 0.0.0.0:{port}", flush=True)
 
     # Print SSH tunnel command
-    default_local_port = 5679
-    ssh_command = _get_ssh_command(hostname, port, default_local_port)
+    ssh_command = ssh_command_future.result()
     print(
         "\nTo connect from a local VS Code instance, run this on your local machine:",
         flush=True,
     )
-    print(f"\033[92m{ssh_command}\033[0m", flush=True)  # Green color
+    # Green on a terminal; rich drops the color when writing to a job's log file
+    _get_console().print(
+        ssh_command, style="green", markup=False, highlight=False, soft_wrap=True
+    )
     print(
         f"Then, attach the debugger to localhost:{default_local_port}.\n",
         flush=True,
@@ -164,6 +247,8 @@ def pause():
         >>> # ... some initialization code ...
         >>> rdg.pause()  # Now wait here for debugger
     """
+    import debugpy
+
     if not _debugger_started:
         raise RuntimeError(
             "Debugger not started. Call start_debugger() first."
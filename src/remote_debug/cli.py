@@ -1,17 +1,41 @@
 import rich_click as click
-from rich.panel import Panel
-from rich.text import Text
-from rich.console import Console
-import socket
 import os
 import sys
-import runpy
-import debugpy
 import json
-import io
-import subprocess
-import questionary
+import re
 from .api import start_debugger as _start_debugger_api
+from .api import _cached_getfqdn
+
+# One row of `squeue -o "%i|%j|%T|%M|%N"` output: id, name, state, time, node.
+# The name is matched greedily since it is the only field that may contain "|".
+_SQUEUE_ROW = re.compile(r"([^|]*)\|(.*)\|([^|]*)\|([^|]*)\|([^|]*)")
+
+# Interpreter names accepted by `rdg debug`, e.g. python, python3, python3.12.
+# Written as a POSIX ERE so that _ACTIVATE_COMMAND can reuse it in bash.
+_PYTHON_COMMAND = re.compile(r"python([0-9]+(\.[0-9]+)?t?)?")
+
+# Row layout for the job selection menu: id, name, state, time, node
+_JOB_ROW_FORMAT = "{:>8} | {:<30} | {:<10} | {:<10} | {}"
+
+
+class _PidParamType(click.ParamType):
+    """A process ID written with ASCII digits only.
+
+    `int()` would also accept signs, underscores, whitespace and non-ASCII digits.
+    """
+
+    name = "pid"
+    _pattern = re.compile(r"[0-9]+")
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, int):
+            return value
+        if not self._pattern.fullmatch(value):
+            self.fail(f"{value!r} is not a valid PID number", param, ctx)
+        return int(value)
+
+
+_PID = _PidParamType()
 
 
 @click.group()
@@ -65,7 +89,7 @@ def debug(lite, post_mortem, command):
 
         rdg debug --post-mortem python my_script.py --arg1 value1
     """
-    if not command or not command[0].endswith("python"):
+    if len(command) < 2 or not _PYTHON_COMMAND.fullmatch(os.path.basename(command[0])):
         click.echo(
             "Usage: rdg debug [--lite] [--post-mortem] python <script.py> [args...]",
             err=True,
@@ -83,20 +107,57 @@ def debug(lite, post_mortem, command):
         _run_normal_mode(script_path, script_args, post_mortem)
 
 
+def _exec_script(script_path):
+    """Run a script as `__main__`, the way `python script.py` would.
+
+    The source is compiled once and executed in a fresh `__main__` module, which
+    skips runpy's path resolution and the extra imports it pulls in. Directories
+    and zipapps are still handed to runpy, which knows how to find their
+    `__main__.py`.
+    """
+    import types
+
+    source = None
+    if os.path.isfile(script_path):
+        with open(script_path, "rb") as f:
+            source = f.read()
+    # Source code can't contain NUL bytes, but zip archives always do
+    if source is None or b"\0" in source:
+        import runpy
+
+        runpy.run_path(script_path, run_name="__main__")
+        return
+
+    code = compile(source, script_path, "exec", dont_inherit=True)
+
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = script_path
+    main_module.__cached__ = None
+
+    # Expose the script as __main__ so that pickling and multiprocessing resolve
+    # objects defined in it, then restore the CLI's module afterwards
+    saved_main = sys.modules.get("__main__")
+    sys.modules["__main__"] = main_module
+    try:
+        exec(code, main_module.__dict__)
+    finally:
+        sys.modules["__main__"] = saved_main
+
+
 def _run_normal_mode(script_path, script_args, post_mortem=False):
     """Run the script with debugger started immediately (original behavior)."""
     import sys
     import traceback
 
     # Set sys.argv to what the script would expect
-    sys.argv = [script_path] + list(script_args)
+    sys.argv = [script_path, *script_args]
     # Add the script's directory to the path to allow for relative imports
     sys.path.insert(0, os.path.dirname(script_path))
 
     if post_mortem:
         # Post-mortem: only start debugger on crash
         try:
-            runpy.run_path(script_path, run_name="__main__")
+            _exec_script(script_path)
         except Exception:
             click.echo("\n[POST-MORTEM] Unhandled exception occurred! Starting debugger...", err=True)
 
@@ -106,6 +167,8 @@ def _run_normal_mode(script_path, script_args, post_mortem=False):
             # Preserve exception info for post-mortem debugging
             exc_info = sys.exc_info()
 
+            import debugpy
+
             # Start debugger server
             _start_debugger_api(wait=False)
 
@@ -117,21 +180,47 @@ def _run_normal_mode(script_path, script_args, post_mortem=False):
 
             # Keep the process alive so you can debug or reconnect
             click.echo("\n[POST-MORTEM] Debugger session active. Press Ctrl+C to exit when done.", err=True)
-            import time
-            while True:
-                time.sleep(1)
+            _wait_for_exit()
     else:
-        # Normal mode: start debugger before running script
+        # Normal mode: start debugger before running script. The script has to run
+        # in this process (no exec) since the debugpy session attached here lives in it.
         _start_debugger_api(wait=True)
-        runpy.run_path(script_path, run_name="__main__")
+        _exec_script(script_path)
+
+
+def _wait_for_exit():
+    """Block until the user interrupts the process (e.g., with Ctrl+C).
+
+    The main thread wakes up once a second rather than blocking indefinitely in
+    C (e.g., in signal.pause()). debugpy can only suspend a thread on a trace
+    event, so these wakeups are what let VS Code's Pause stop the thread again
+    after continuing from the post-mortem breakpoint or reconnecting.
+    """
+    import time
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        sys.exit(1)
 
 
 def _run_lite_mode(script_path, script_args, post_mortem=False):
     """Run the script with signal-based debugger activation."""
     import signal
     import sys
+    import threading
     import traceback
 
+    # The SIGUSR1 handler can only be installed from the main thread, and Python
+    # only delivers signals to handlers there. Check before announcing anything.
+    if threading.current_thread() is not threading.main_thread():
+        click.echo(
+            "Error: Lite mode must be started from the main thread to install its SIGUSR1 handler.",
+            err=True,
+        )
+        sys.exit(1)
+
     # Print initial message
     job_id = os.environ.get("SLURM_JOB_ID", "UNKNOWN")
     pid = os.getpid()
@@ -153,16 +242,20 @@ def _run_lite_mode(script_path, script_args, post_mortem=False):
         # Use the shared API to start the debugger
         _start_debugger_api(wait=True)
 
+    # Resolve the login host now (the lookup is cached), so that printing the
+    # SSH tunnel command from the signal handler doesn't block on DNS
+    _get_user_and_host()
+
     # Register the signal handler
     signal.signal(signal.SIGUSR1, _activate_debugger)
 
     # Execute the target script
-    sys.argv = [script_path] + list(script_args)
+    sys.argv = [script_path, *script_args]
     sys.path.insert(0, os.path.dirname(script_path))
 
     if post_mortem:
         try:
-            runpy.run_path(script_path, run_name="__main__")
+            _exec_script(script_path)
         except Exception:
             print("\n[POST-MORTEM] Unhandled exception occurred! Starting debugger...", flush=True)
 
@@ -172,6 +265,8 @@ def _run_lite_mode(script_path, script_args, post_mortem=False):
             # Preserve exception info for post-mortem debugging
             exc_info = sys.exc_info()
 
+            import debugpy
+
             # Start debugger server
             _start_debugger_api(wait=False)
 
@@ -183,11 +278,68 @@ def _run_lite_mode(script_path, script_args, post_mortem=False):
 
             # Keep the process alive so you can debug or reconnect
             print("\n[POST-MORTEM] Debugger session active. Press Ctrl+C to exit when done.", flush=True)
-            import time
-            while True:
-                time.sleep(1)
+            _wait_for_exit()
     else:
-        runpy.run_path(script_path, run_name="__main__")
+        _exec_script(script_path)
+
+
+# Launch configurations and inputs that `rdg init` adds to .vscode/launch.json
+_NEW_CONFIGS = [
+    {
+        "name": "Python Debugger: Remote Attach (via SSH Tunnel)",
+        "type": "debugpy",
+        "request": "attach",
+        "connect": {"host": "localhost", "port": "${input:localTunnelPort}"},
+        "pathMappings": [
+            {
+                "localRoot": "${workspaceFolder}",
+                "remoteRoot": "${input:remoteWorkspaceFolder}",
+            }
+        ],
+    },
+    {
+        "name": "Python Debugger: Attach to Compute Node",
+        "type": "debugpy",
+        "request": "attach",
+        "connect": {
+            "host": "${input:computeNodeHost}",
+            "port": "${input:computeNodePort}",
+        },
+        "pathMappings": [
+            {"localRoot": "${workspaceFolder}", "remoteRoot": "${workspaceFolder}"}
+        ],
+    },
+]
+
+_NEW_INPUTS = [
+    {
+        "id": "localTunnelPort",
+        "type": "promptString",
+        "description": "Enter the local port your SSH tunnel is forwarding to (e.g., 5678).",
+        "default": "5678",
+    },
+    {
+        "id": "remoteDebugPort",
+        "type": "promptString",
+        "description": "Enter the remote debugger port.",
+        "default": "5679",
+    },
+    {
+        "id": "remoteWorkspaceFolder",
+        "type": "promptString",
+        "description": "Enter the absolute path to the project folder on the remote machine.",
+    },
+    {
+        "id": "computeNodeHost",
+        "type": "promptString",
+        "description": "Enter the compute node hostname (e.g., node123.cluster.local).",
+    },
+    {
+        "id": "computeNodePort",
+        "type": "promptString",
+        "description": "Enter the port the remote debugger is listening on.",
+    },
+]
 
 
 @cli.command()
@@ -202,124 +354,103 @@ def init():
     2.  **Python Debugger: Attach to Compute Node**:
         For connecting directly when you are already on the cluster's login node using the VS Code SSH extension.
     """
+    from pathlib import Path
+
+    try:
+        # Optional: a faster parser for reading existing launch.json files
+        import orjson
+    except ImportError:
+        orjson = None
+
     click.echo("Initializing debug configuration...")
 
-    vscode_dir = ".vscode"
-    launch_json_path = os.path.join(vscode_dir, "launch.json")
-
-    # Define the new configurations and inputs
-    new_configs = [
-        {
-            "name": "Python Debugger: Remote Attach (via SSH Tunnel)",
-            "type": "debugpy",
-            "request": "attach",
-            "connect": {"host": "localhost", "port": "${input:localTunnelPort}"},
-            "pathMappings": [
-                {
-                    "localRoot": "${workspaceFolder}",
-                    "remoteRoot": "${input:remoteWorkspaceFolder}",
-                }
-            ],
-        },
-        {
-            "name": "Python Debugger: Attach to Compute Node",
-            "type": "debugpy",
-            "request": "attach",
-            "connect": {
-                "host": "${input:computeNodeHost}",
-                "port": "${input:computeNodePort}",
-            },
-            "pathMappings": [
-                {"localRoot": "${workspaceFolder}", "remoteRoot": "${workspaceFolder}"}
-            ],
-        },
-    ]
-
-    new_inputs = [
-        {
-            "id": "localTunnelPort",
-            "type": "promptString",
-            "description": "Enter the local port your SSH tunnel is forwarding to (e.g., 5678).",
-            "default": "5678",
-        },
-        {
-            "id": "remoteDebugPort",
-            "type": "promptString",
-            "description": "Enter the remote debugger port.",
-            "default": "5679",
-        },
-        {
-            "id": "remoteWorkspaceFolder",
-            "type": "promptString",
-            "description": "Enter the absolute path to the project folder on the remote machine.",
-        },
-        {
-            "id": "computeNodeHost",
-            "type": "promptString",
-            "description": "Enter the compute node hostname (e.g., node123.cluster.local).",
-        },
-        {
-            "id": "computeNodePort",
-            "type": "promptString",
-            "description": "Enter the port the remote debugger is listening on.",
-        },
-    ]
+    launch_json_path = Path(".vscode") / "launch.json"
 
     # Ensure .vscode directory exists
-    os.makedirs(vscode_dir, exist_ok=True)
-
-    # Read existing launch.json or create a new structure
-    if os.path.exists(launch_json_path):
-        with open(launch_json_path, "r") as f:
-            try:
-                launch_data = json.load(f)
-                if "version" not in launch_data:
-                    launch_data["version"] = "0.2.0"
-                if "configurations" not in launch_data:
-                    launch_data["configurations"] = []
-            except json.JSONDecodeError:
-                click.echo(
-                    f"Warning: '{launch_json_path}' is malformed. Backing up and creating a new one.",
-                    err=True,
-                )
-                os.rename(launch_json_path, launch_json_path + ".bak")
-                launch_data = {"version": "0.2.0", "configurations": [], "inputs": []}
-    else:
+    launch_json_path.parent.mkdir(exist_ok=True)
+
+    # Read existing launch.json or create a new structure. `changed` tracks
+    # whether anything needs to be written back.
+    changed = False
+    try:
+        raw = launch_json_path.read_bytes()
+    except FileNotFoundError:
         launch_data = {"version": "0.2.0", "configurations": [], "inputs": []}
+        changed = True
+    else:
+        try:
+            launch_data = None
+            if orjson:
+                try:
+                    launch_data = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    # orjson is stricter than json (it rejects a UTF-8 BOM, NaN
+                    # and Infinity), so json has the final say on what is malformed
+                    pass
+            if launch_data is None:
+                launch_data = json.loads(raw)
+            if "version" not in launch_data:
+                launch_data["version"] = "0.2.0"
+                changed = True
+            if "configurations" not in launch_data:
+                launch_data["configurations"] = []
+                changed = True
+        except json.JSONDecodeError:
+            click.echo(
+                f"Warning: '{launch_json_path}' is malformed. Backing up and creating a new one.",
+                err=True,
+            )
+            launch_json_path.rename(launch_json_path.with_suffix(".json.bak"))
+            launch_data = {"version": "0.2.0", "configurations": [], "inputs": []}
+            changed = True
 
     # Add new configurations if they don't already exist
     existing_config_names = {
         c.get("name") for c in launch_data.get("configurations", [])
     }
-    for config in new_configs:
+    for config in _NEW_CONFIGS:
         if config["name"] not in existing_config_names:
             launch_data["configurations"].append(config)
+            changed = True
             click.echo(f"Added '{config['name']}' configuration.")
 
     # Add new inputs if they don't already exist
     if "inputs" not in launch_data:
         launch_data["inputs"] = []
+        changed = True
     existing_input_ids = {i.get("id") for i in launch_data.get("inputs", [])}
-    for new_input in new_inputs:
+    for new_input in _NEW_INPUTS:
         if new_input["id"] not in existing_input_ids:
             launch_data["inputs"].append(new_input)
+            changed = True
+
+    # Leave the file untouched if it already has everything
+    if not changed:
+        click.echo(f"'{launch_json_path}' is already up to date.")
+        return
 
-    # Write the updated launch.json back to the file
-    with open(launch_json_path, "w") as f:
-        json.dump(launch_data, f, indent=4)
+    # Write the updated launch.json to a temporary file and swap it into place,
+    # so an interrupted write can never leave a truncated launch.json behind
+    tmp_path = launch_json_path.with_suffix(".json.tmp")
+    tmp_path.write_text(json.dumps(launch_data, indent=4))
+    os.replace(tmp_path, launch_json_path)
 
     click.echo(f"Successfully updated '{launch_json_path}'.")
 
 
 @cli.command()
 @click.argument("job_id", required=False)
-@click.argument("pid", required=False)
+@click.argument("pid", required=False, type=_PID)
 def attach(job_id, pid):
     """Attach to a running lite-mode debugger job.
 
     Send a SIGUSR1 signal to activate the debugger in a job started with 'rdg debug --lite'.
+    On Python 3.14+, processes not armed by lite mode get the debugger injected with
+    sys.remote_exec instead, so they need not be started in lite mode. Processes that
+    can neither be signalled safely nor injected are left alone.
 
-    If JOB_ID is not provided, you'll be prompted to select from your running jobs.
+    If JOB_ID is not provided, the current job is used when running inside one;
+    otherwise you'll be prompted to select from your running jobs.
     If PID is not provided, you'll be prompted to enter it.
 
     Examples:
@@ -327,6 +458,8 @@ def attach(job_id, pid):
         rdg attach 12345  (will prompt for PID)
         rdg attach        (will prompt for both)
     """
+    import concurrent.futures
+
     # If no job_id provided, show interactive selection
     if not job_id:
         job_id = _select_job_interactive()
@@ -339,26 +472,136 @@ def attach(job_id, pid):
         click.echo(
             f"\nCheck the job output for the PID (look for 'PID:' in the output)."
         )
-        pid = questionary.text(
-            "Enter the Python process PID:",
-            validate=lambda text: text.isdigit() or "Please enter a valid PID number",
-        ).ask()
+        # Look the job up while the user is typing the PID
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            job_state = executor.submit(_get_job_state, job_id)
+            pid = click.prompt("Enter the Python process PID", type=_PID)
+        state = job_state.result()
+    else:
+        state = _get_job_state(job_id)
+
+    # Fail fast on finished or invalid jobs instead of waiting for srun to time out
+    if state is None:
+        click.secho(
+            f"✗ Job {job_id} was not found. Has it already finished?",
+            fg="red",
+            err=True,
+        )
+        sys.exit(1)
+    if state not in ("RUNNING", "UNKNOWN"):
+        click.secho(f"✗ Job {job_id} is {state}, not RUNNING", fg="red", err=True)
+        sys.exit(1)
+
+    click.echo(f"Activating the debugger in job {job_id} (PID {pid})...")
+    if _is_local_job_process(pid, job_id):
+        # The process runs on this node, so skip srun entirely
+        injected = _activate_locally(job_id, pid)
+    else:
+        injected = _activate_via_srun(job_id, pid)
+
+    if injected:
+        click.secho(
+            f"✓ Debugger injected into job {job_id} with sys.remote_exec!", fg="green"
+        )
+        click.echo("It starts the next time the process runs Python code.")
+    else:
+        click.secho(f"✓ Signal sent successfully to job {job_id}!", fg="green")
+
+    # Print instructions
+    click.echo(f"\nThe debugger should now be activating in job {job_id}.")
+    click.echo(f"Check your job output file (typically slurm-{job_id}.out) for:")
+    click.echo("  • Debugger connection details (hostname, port)")
+    click.echo("  • SSH tunnel command")
+    click.echo("\nThen create the tunnel and attach VS Code as usual.")
+
+
+# Runs the _activate module's source on the compute node with the target's own
+# interpreter, provided the target is a Python process. -I keeps the current
+# directory off sys.path, so local modules can't shadow the standard library.
+# Arguments: PID, interpreter name pattern, source.
+_ACTIVATE_COMMAND = """\
+exe=$(readlink "/proc/$1/exe") || { echo "No process $1 on $(hostname)" >&2; exit 1; }
+[[ ${exe##*/} =~ ^($2)$ ]] || { echo "PID $1 is not a Python process" >&2; exit 1; }
+exec "$exe" -I -c "$3" "$1"
+"""
 
-        if not pid:
-            click.echo("No PID provided. Exiting.", err=True)
-            sys.exit(1)
 
-    # Send the SIGUSR1 signal using srun
-    click.echo(f"Sending activation signal to job {job_id} (PID {pid})...")
+def _get_activate_source():
+    """Return the source of the _activate module, which runs next to the target."""
+    from . import _activate
+
+    with open(_activate.__file__) as f:
+        return f.read()
+
+
+def _activate_locally(job_id, pid):
+    """Activate the debugger in a process running on this node.
+
+    A lite-mode process is signalled directly. Only injection needs to start the
+    target's own interpreter.
+
+    Returns:
+        bool: True if the debugger was injected, False if SIGUSR1 was sent
+    """
+    import signal
+    from . import _activate
+
     try:
-        subprocess.run(
-            ["srun", f"--jobid={job_id}", "bash", "-c", f"kill -USR1 {pid}"],
+        if _activate.is_lite_mode_armed(pid):
+            os.kill(int(pid), signal.SIGUSR1)
+            return False
+        exe = os.readlink(f"/proc/{pid}/exe")
+    except OSError as e:
+        click.secho(f"✗ Failed to send signal to job {job_id}", fg="red", err=True)
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+    if not _PYTHON_COMMAND.fullmatch(os.path.basename(exe)):
+        click.secho(f"✗ PID {pid} is not a Python process", fg="red", err=True)
+        sys.exit(1)
+    return _run_activation(
+        job_id, [exe, "-I", "-c", _get_activate_source(), str(pid)]
+    )
+
+
+def _activate_via_srun(job_id, pid):
+    """Activate the debugger in a process on the job's compute node using srun.
+
+    Returns:
+        bool: True if the debugger was injected, False if SIGUSR1 was sent
+    """
+    return _run_activation(
+        job_id,
+        [
+            "srun",
+            f"--jobid={job_id}",
+            "bash",
+            "-c",
+            _ACTIVATE_COMMAND,
+            "rdg-attach",
+            str(pid),
+            _PYTHON_COMMAND.pattern,
+            _get_activate_source(),
+        ],
+    )
+
+
+def _run_activation(job_id, command):
+    """Run an activation command and report how the debugger was activated.
+
+    Returns:
+        bool: True if the debugger was injected, False if SIGUSR1 was sent
+    """
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            command,
             capture_output=True,
             text=True,
             check=True,
-            timeout=10,
+            timeout=5,
         )
-        click.secho(f"✓ Signal sent successfully to job {job_id}!", fg="green")
     except subprocess.TimeoutExpired:
         click.secho(f"✗ Timeout sending signal to job {job_id}", fg="red", err=True)
         sys.exit(1)
@@ -368,93 +611,138 @@ def attach(job_id, pid):
             click.echo(f"Error: {e.stderr.strip()}", err=True)
         sys.exit(1)
     except FileNotFoundError:
-        click.secho(
-            "✗ 'srun' command not found. Are you on a Slurm cluster?",
-            fg="red",
-            err=True,
-        )
+        if command[0] == "srun":
+            click.secho(
+                "✗ 'srun' command not found. Are you on a Slurm cluster?",
+                fg="red",
+                err=True,
+            )
+        else:
+            click.secho(
+                f"✗ The process's interpreter '{command[0]}' was not found",
+                fg="red",
+                err=True,
+            )
         sys.exit(1)
+    return "injected" in result.stdout.split()
 
-    # Print instructions
-    click.echo(f"\nThe debugger should now be activating in job {job_id}.")
-    click.echo(f"Check your job output file (typically slurm-{job_id}.out) for:")
-    click.echo("  • Debugger connection details (hostname, port)")
-    click.echo("  • SSH tunnel command")
-    click.echo("\nThen create the tunnel and attach VS Code as usual.")
+
+def _is_local_job_process(pid, job_id):
+    """Check whether PID is a live process on this node that belongs to JOB_ID.
+
+    PIDs are only unique per node, so the process's environment must also carry
+    the job's SLURM_JOB_ID before it is safe to signal it directly. Reading
+    /proc/<pid>/environ fails for processes that don't exist or that belong to
+    other users, so no separate liveness probe is needed.
+    """
+    try:
+        with open(f"/proc/{pid}/environ", "rb") as f:
+            environ = f.read().split(b"\0")
+    except OSError:
+        return False
+    return f"SLURM_JOB_ID={job_id}".encode() in environ
 
 
 def _select_job_interactive():
     """Show an interactive job selection menu using squeue.
 
+    When running inside a Slurm job, that job is selected without querying squeue.
+
     Returns:
         str: Selected job ID, or None if cancelled
     """
+    import subprocess
+    import tempfile
+
+    current_job_id = os.environ.get("SLURM_JOB_ID")
+    if current_job_id:
+        click.echo(f"Using the current job {current_job_id} (from $SLURM_JOB_ID).")
+        return current_job_id
+
     user, _ = _get_user_and_host()
 
     if not user:
         click.echo("Error: Could not determine username.", err=True)
         return None
 
-    # Run squeue to get user's jobs across all partitions
-    try:
-        result = subprocess.run(
-            ["squeue", "-u", user, "-h", "-o", "%i|%j|%T|%M|%N", "-a"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
+    # Run squeue to get user's jobs across all partitions. Its stderr goes to a
+    # file rather than a second pipe, which could fill up and block squeue while
+    # stdout is being read.
+    with tempfile.TemporaryFile(mode="w+") as stderr_file:
+        try:
+            proc = subprocess.Popen(
+                ["squeue", "-u", user, "-h", "-o", "%i|%j|%T|%M|%N", "-a"],
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+            )
+        except FileNotFoundError:
+            click.secho(
+                "✗ 'squeue' command not found. Are you on a Slurm cluster?",
+                fg="red",
+                err=True,
+            )
+            return None
+
+        # Parse squeue output line by line as it arrives, formatting each menu
+        # row in the same pass
+        job_ids = []
+        rows = []
+        with proc:
+            for line in proc.stdout:
+                match = _SQUEUE_ROW.fullmatch(line.rstrip("\n"))
+                if match:
+                    job_ids.append(match[1])
+                    rows.append(_JOB_ROW_FORMAT.format(*match.groups()))
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+
+    if proc.returncode != 0:
         click.secho("✗ Failed to retrieve job list", fg="red", err=True)
-        if e.stderr:
-            click.echo(f"Error: {e.stderr.strip()}", err=True)
-        return None
-    except FileNotFoundError:
-        click.secho(
-            "✗ 'squeue' command not found. Are you on a Slurm cluster?",
-            fg="red",
-            err=True,
-        )
+        if stderr:
+            click.echo(f"Error: {stderr.strip()}", err=True)
         return None
 
-    # Parse squeue output
-    jobs = []
-    for line in result.stdout.strip().split("\n"):
-        if not line:
-            continue
-        parts = line.split("|")
-        if len(parts) >= 5:
-            job_id, job_name, state, time, node = parts
-            jobs.append(
-                {
-                    "id": job_id,
-                    "name": job_name,
-                    "state": state,
-                    "time": time,
-                    "node": node,
-                }
-            )
-
-    if not jobs:
+    if not job_ids:
         click.echo(f"No running jobs found for user '{user}'.", err=True)
         return None
 
-    # Create questionary choices
-    choices = [
-        {
-            "name": f"{job['id']:>8} | {job['name']:<30} | {job['state']:<10} | {job['time']:<10} | {job['node']}",
-            "value": job["id"],
-        }
-        for job in jobs
-    ]
+    # Show a numbered selection menu
+    click.echo(f"\nFound {len(job_ids)} job(s) for user '{user}':\n")
+    for index, row in enumerate(rows, start=1):
+        click.echo(f"  [{index}] {row}")
+    selected = click.prompt(
+        "\nSelect a job to attach to", type=click.IntRange(1, len(job_ids))
+    )
+
+    return job_ids[selected - 1]
 
-    # Show interactive selection
-    click.echo(f"\nFound {len(jobs)} job(s) for user '{user}':\n")
-    selected = questionary.select(
-        "Select a job to attach to:",
-        choices=choices,
-    ).ask()
 
-    return selected
+def _get_job_state(job_id):
+    """Look up the state of a Slurm job using scontrol.
+
+    Returns:
+        str: The job state (e.g., RUNNING), None if Slurm does not know the job,
+             or "UNKNOWN" if scontrol could not be queried
+    """
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            ["scontrol", "--oneliner", "show", "job", job_id],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return "UNKNOWN"
+
+    if result.returncode != 0:
+        return None if "Invalid job id" in result.stderr else "UNKNOWN"
+    for field in result.stdout.split():
+        if field.startswith("JobState="):
+            return field[len("JobState=") :]
+    return "UNKNOWN"
 
 
 def _get_user_and_host():
@@ -463,16 +751,18 @@ def _get_user_and_host():
     Returns:
         tuple: (user, login_host) where login_host is the FQDN if possible, or None if not available
     """
+    import socket
+
     user = os.environ.get("SLURM_JOB_USER") or os.environ.get("USER")
     submit_host_short = os.environ.get("SLURM_SUBMIT_HOST")
 
     if user and submit_host_short:
         try:
-            # Attempt to resolve the fully qualified domain name
-            submit_host_fqdn = socket.getfqdn(submit_host_short)
-            # Fix for cases where getfqdn returns a doubled hostname (e.g., host.host.domain.com)
-            if submit_host_fqdn.startswith(submit_host_short + "." + submit_host_short):
-                submit_host_fqdn = submit_host_fqdn[len(submit_host_short) + 1 :]
+            # Attempt to resolve the fully qualified domain name, unless it was
+            # provided up front via REMOTE_DEBUG_FQDN
+            submit_host_fqdn = os.environ.get("REMOTE_DEBUG_FQDN") or _cached_getfqdn(
+                submit_host_short
+            )
             return user, submit_host_fqdn
         except socket.gaierror:
             # Fallback to short name if resolution fails
@@ -1,21 +1,33 @@
+import io
+import pytest
 import sys
+import subprocess
 from click.testing import CliRunner
 from unittest.mock import patch, ANY
 import os
-from remote_debug.cli import cli
+from remote_debug.cli import (
+    cli,
+    _exec_script,
+    _is_local_job_process,
+    _activate_via_srun,
+    _select_job_interactive,
+    _activate_locally,
+    _ACTIVATE_COMMAND,
+)
+from remote_debug._activate import _has_lite_flag
 import json
 
 
-@patch("remote_debug.cli.runpy.run_path")
-@patch("remote_debug.cli.debugpy.wait_for_client")
-@patch("remote_debug.cli.debugpy.listen")
-def test_debug_command(mock_listen, mock_wait_for_client, mock_run_path, tmp_path):
+@patch("remote_debug.cli._exec_script")
+@patch("debugpy.wait_for_client")
+@patch("debugpy.listen")
+def test_debug_command(mock_listen, mock_wait_for_client, mock_exec_script, tmp_path):
     """
     Tests the debug command.
     - Creates a temporary script file.
-    - Mocks debugpy and runpy to avoid actual debugging and execution.
+    - Mocks debugpy and the script runner to avoid actual debugging and execution.
     - Verifies that the command prints the correct info.
-    - Verifies that debugpy and runpy are called with the correct arguments.
+    - Verifies that debugpy and the script runner are called with the correct arguments.
     """
     # Create a dummy script file to be "debugged"
     script_dir = tmp_path / "project"
@@ -50,18 +62,16 @@ def test_debug_command(mock_listen, mock_wait_for_client, mock_run_path, tmp_pat
         mock_listen.assert_called_once_with(("0.0.0.0", ANY))
         mock_wait_for_client.assert_called_once()
 
-        # Check that the script was called correctly via runpy
-        mock_run_path.assert_called_once_with(str(script_path), run_name="__main__")
+        # Check that the script was run correctly
+        mock_exec_script.assert_called_once_with(str(script_path))
 
-        # Check that sys.argv and sys.path were correctly modified before runpy
-        # The call to run_path happens inside the invoke, so we check the state of sys
+        # Check that sys.argv and sys.path were correctly modified before running
+        # The script runs inside the invoke, so we check the state of sys
         # after it has been modified by our command.
-        # The first argument to run_path is a tuple of args.
-        call_args, _ = mock_run_path.call_args
 
         # The test needs to check the state of sys.argv and sys.path *within* the invoked command's context.
-        # Since runpy doesn't expose what sys.argv was, we can patch sys and check it.
-        # For this example, we'll rely on the fact that runpy uses the global sys.
+        # Since the runner doesn't expose what sys.argv was, we can patch sys and check it.
+        # For this example, we'll rely on the fact that the script uses the global sys.
         # A more complex test could involve another mock.
         assert sys.argv == [str(script_path)] + script_args
         assert sys.path[0] == str(script_dir)
@@ -72,6 +82,59 @@ def test_debug_command(mock_listen, mock_wait_for_client, mock_run_path, tmp_pat
         sys.path = original_path
 
 
+def test_debug_requires_python_command():
+    """
+    Tests that the debug command only accepts Python interpreters followed by a script.
+    """
+    runner = CliRunner()
+
+    for command in (["mypython", "script.py"], ["python3.12-config", "x"], ["python"]):
+        result = runner.invoke(cli, ["debug"] + command)
+        assert result.exit_code == 1
+        assert "Usage: rdg debug" in result.output
+
+
+def test_exec_script_runs_as_main(tmp_path):
+    """
+    Tests that scripts run as `__main__` with `__file__` set, and that the
+    original `__main__` module is restored afterwards.
+    """
+    output_path = tmp_path / "output.txt"
+    script_path = tmp_path / "myscript.py"
+    script_path.write_text(
+        "import sys\n"
+        "if __name__ == '__main__':\n"
+        f"    with open({str(output_path)!r}, 'w') as f:\n"
+        "        f.write(__file__ + '|' + str(sys.modules['__main__'].__file__))\n"
+    )
+
+    original_main = sys.modules["__main__"]
+    _exec_script(str(script_path))
+
+    assert output_path.read_text() == f"{script_path}|{script_path}"
+    assert sys.modules["__main__"] is original_main
+
+
+def test_exec_script_runs_directories_and_zipapps(tmp_path):
+    """
+    Tests that directories and zipapps still run through their `__main__.py`.
+    """
+    import zipapp
+
+    output_path = tmp_path / "output.txt"
+    app_dir = tmp_path / "app"
+    app_dir.mkdir()
+    (app_dir / "__main__.py").write_text(
+        f"open({str(output_path)!r}, 'a').write(__name__ + '\\n')\n"
+    )
+    zipapp.create_archive(app_dir, tmp_path / "app.pyz")
+
+    _exec_script(str(app_dir))
+    _exec_script(str(tmp_path / "app.pyz"))
+
+    assert output_path.read_text() == "__main__\n__main__\n"
+
+
 def test_init_new_config():
     """
     Tests that the init command creates a new .vscode/launch.json file correctly.
@@ -148,6 +211,23 @@ def test_init_update_existing_config():
         assert len(data["inputs"]) == 4
 
 
+def test_init_leaves_up_to_date_config_untouched():
+    """
+    Tests that running init twice does not rewrite an up-to-date launch.json.
+    """
+    runner = CliRunner()
+    with runner.isolated_filesystem() as td:
+        runner.invoke(cli, ["init"], catch_exceptions=False)
+        launch_path = os.path.join(td, ".vscode", "launch.json")
+        mtime = os.stat(launch_path).st_mtime_ns
+
+        result = runner.invoke(cli, ["init"], catch_exceptions=False)
+        assert result.exit_code == 0
+        assert "is already up to date." in result.output
+        assert "Successfully updated" not in result.output
+        assert os.stat(launch_path).st_mtime_ns == mtime
+
+
 def test_init_handles_malformed_config():
     """
     Tests that the init command handles a malformed launch.json by backing it up
@@ -176,3 +256,419 @@ def test_init_handles_malformed_config():
         with open(launch_path, "r") as f:
             data = json.load(f)
         assert len(data["configurations"]) == 2
+
+
+def test_init_keeps_config_with_bom():
+    """
+    Tests that a launch.json starting with a UTF-8 BOM is updated in place rather
+    than treated as malformed.
+    """
+    runner = CliRunner()
+    with runner.isolated_filesystem() as td:
+        vscode_dir = os.path.join(td, ".vscode")
+        os.makedirs(vscode_dir)
+        launch_path = os.path.join(vscode_dir, "launch.json")
+
+        existing = {"version": "0.2.0", "configurations": [{"name": "Existing Config"}]}
+        with open(launch_path, "w", encoding="utf-8-sig") as f:
+            json.dump(existing, f)
+
+        result = runner.invoke(cli, ["init"], catch_exceptions=False)
+        assert result.exit_code == 0
+        assert "malformed" not in result.output
+        assert not os.path.exists(launch_path + ".bak")
+
+        with open(launch_path, "r") as f:
+            data = json.load(f)
+        assert data["configurations"][0]["name"] == "Existing Config"
+
+
+@patch("subprocess.run")
+def test_attach_fails_fast_for_unknown_job(mock_run):
+    """
+    Tests that attach checks the job with scontrol (while prompting for the PID,
+    if needed) and exits before trying to signal a job that no longer exists.
+    """
+    mock_run.return_value = subprocess.CompletedProcess(
+        args=[],
+        returncode=1,
+        stdout="",
+        stderr="slurm_load_jobs error: Invalid job id specified",
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["attach", "12345"], input="4242\n")
+
+    assert result.exit_code == 1
+    assert "Job 12345 was not found" in result.output
+    # Only the scontrol lookup ran; srun was never called
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0][0] == "scontrol"
+
+    mock_run.reset_mock()
+    result = runner.invoke(cli, ["attach", "12345", "4242"])
+
+    assert result.exit_code == 1
+    assert "Job 12345 was not found" in result.output
+    mock_run.assert_called_once()
+    assert mock_run.call_args[0][0][0] == "scontrol"
+
+
+def test_is_local_job_process():
+    """
+    Tests that a local process is only treated as part of a job when its
+    environment carries the matching SLURM_JOB_ID.
+    """
+    env = dict(os.environ, SLURM_JOB_ID="4242")
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import time; print('ready', flush=True); time.sleep(30)",
+        ],
+        env=env,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        # Wait until the child is fully started before inspecting it
+        proc.stdout.readline()
+        assert _is_local_job_process(str(proc.pid), "4242")
+        assert not _is_local_job_process(str(proc.pid), "4243")
+    finally:
+        proc.kill()
+        proc.wait()
+        proc.stdout.close()
+
+    # A PID that no longer exists is never local
+    assert not _is_local_job_process(str(proc.pid), "4242")
+
+
+def test_attach_rejects_non_ascii_pid():
+    """
+    Tests that PIDs must be plain ASCII digits, both as an argument and at the prompt.
+    """
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["attach", "12345", "1;ls"])
+    assert result.exit_code == 2
+    assert "'1;ls' is not a valid PID number" in result.output
+
+    with patch("remote_debug.cli._get_job_state", return_value=None):
+        result = runner.invoke(cli, ["attach", "12345"], input="٣\n42\n")
+    assert "'٣' is not a valid PID number" in result.output
+    assert "Job 12345 was not found" in result.output
+
+
+@patch("subprocess.run")
+def test_activate_via_srun_reports_injection(mock_run):
+    """
+    Tests that the srun activation passes the PID as an argument rather than
+    splicing it into the command, and reports whether the debugger was injected
+    with sys.remote_exec or the lite-mode signal was sent instead.
+    """
+    mock_run.return_value = subprocess.CompletedProcess(
+        args=[], returncode=0, stdout="injected\n", stderr=""
+    )
+    assert _activate_via_srun("12345", 4242)
+
+    command = mock_run.call_args[0][0]
+    assert command[:7] == [
+        "srun",
+        "--jobid=12345",
+        "bash",
+        "-c",
+        _ACTIVATE_COMMAND,
+        "rdg-attach",
+        "4242",
+    ]
+    assert "def is_lite_mode_armed(pid):" in command[8]
+
+    mock_run.return_value.stdout = "signalled\n"
+    assert not _activate_via_srun("12345", 4242)
+
+
+def test_has_lite_flag():
+    """
+    Tests that lite mode is recognized from `rdg debug` command lines only.
+    """
+    assert _has_lite_flag(
+        ["python", "/env/bin/rdg", "debug", "--lite", "python", "x.py"]
+    )
+    assert _has_lite_flag(["python", "/env/bin/rdg", "debug", "-pl", "python", "x.py"])
+    assert _has_lite_flag(["python", "-m", "remote_debug.cli", "debug", "-l", "python"])
+    assert not _has_lite_flag(
+        ["python", "/env/bin/rdg", "debug", "python", "x.py", "-l"]
+    )
+    assert not _has_lite_flag(["python", "/env/bin/rdg", "debug", "--post-mortem"])
+    assert not _has_lite_flag(["python", "train.py", "--lite"])
+
+
+def _start_sleeper(handler, args):
+    """Start a Python process that sleeps with the given SIGUSR1 handler and argv."""
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-I",
+            "-c",
+            f"import os, signal, time\n{handler}\nprint('ready', flush=True)\n"
+            "time.sleep(30)",
+            *args,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        # Make sys.remote_exec fail on Python 3.14+ as well
+        env={**os.environ, "PYTHON_DISABLE_REMOTE_DEBUG": "1"},
+    )
+    proc.stdout.readline()
+    return proc
+
+
+def test_activate_locally_signals_only_lite_mode_processes(
+    tmp_path, monkeypatch, capsys
+):
+    """
+    Tests that SIGUSR1 is only sent to processes armed by `rdg debug --lite`,
+    since other handlers (or its default action) would do something else entirely.
+    """
+    # Local modules must not shadow the standard library in the target's interpreter
+    (tmp_path / "signal.py").write_text("raise ImportError('shadowed')\n")
+    monkeypatch.chdir(tmp_path)
+
+    handler = "signal.signal(signal.SIGUSR1, lambda *_: os.write(1, b'woken\\n'))"
+    lite_args = ["rdg", "debug", "--lite", "python", "x.py"]
+    for handler, args, armed in (
+        (handler, lite_args, True),
+        (handler, ["train.py"], False),
+        ("", lite_args, False),
+    ):
+        proc = _start_sleeper(handler, args)
+        try:
+            if armed:
+                assert _activate_locally("4242", proc.pid) is False
+                assert proc.stdout.readline() == "woken\n"
+            else:
+                with pytest.raises(SystemExit):
+                    _activate_locally("4242", proc.pid)
+                assert "is not armed by 'rdg debug --lite'" in capsys.readouterr().err
+            # Either way, the process is still alive
+            assert proc.poll() is None
+        finally:
+            proc.kill()
+            proc.wait()
+            proc.stdout.close()
+
+
+def test_activate_refuses_non_python_processes(capsys):
+    """
+    Tests that activation never runs its program with a non-Python executable.
+    """
+    proc = subprocess.Popen(["sleep", "30"])
+    try:
+        with pytest.raises(SystemExit):
+            _activate_locally("4242", proc.pid)
+        assert f"PID {proc.pid} is not a Python process" in capsys.readouterr().err
+
+        result = subprocess.run(
+            [
+                "bash",
+                "-c",
+                _ACTIVATE_COMMAND,
+                "rdg-attach",
+                str(proc.pid),
+                "python",
+                "",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1
+        assert f"PID {proc.pid} is not a Python process" in result.stderr
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+@patch("remote_debug.cli.click.prompt", return_value=2)
+@patch("subprocess.Popen")
+def test_select_job_handles_pipes_in_job_names(
+    mock_popen, mock_prompt, monkeypatch, capsys
+):
+    """
+    Tests that squeue rows are parsed correctly even when a job name contains
+    the "|" field separator, and that blank lines are skipped.
+    """
+    monkeypatch.delenv("SLURM_JOB_ID", raising=False)
+    monkeypatch.setenv("USER", "me")
+    proc = mock_popen.return_value
+    proc.stdout = io.StringIO("101|train|RUNNING|1:00|node1\n\n102|a|b|PENDING|0:00|\n")
+    proc.returncode = 0
+
+    assert _select_job_interactive() == "102"
+
+    output = capsys.readouterr().out
+    assert "Found 2 job(s) for user 'me'" in output
+    assert "a|b" in output
+
+
+def test_select_job_survives_verbose_squeue_errors(monkeypatch, tmp_path, capsys):
+    """
+    Tests that squeue writing more than a pipe buffer to stderr does not block
+    it while its stdout is being read.
+    """
+    squeue = tmp_path / "squeue"
+    squeue.write_text(
+        "#!/bin/sh\nhead -c 200000 /dev/zero | tr '\\0' x >&2\necho >&2\nexit 1\n"
+    )
+    squeue.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.delenv("SLURM_JOB_ID", raising=False)
+    monkeypatch.setenv("USER", "me")
+
+    assert _select_job_interactive() is None
+    assert "Failed to retrieve job list" in capsys.readouterr().err
+
+
+@patch("remote_debug.cli._get_user_and_host")
+def test_lite_mode_rejects_worker_threads_up_front(mock_get_user_and_host, capsys):
+    """
+    Tests that lite mode refuses to run off the main thread before announcing
+    itself or resolving the login host.
+    """
+    import threading
+    from remote_debug.cli import _run_lite_mode
+
+    exit_codes = []
+
+    def run():
+        try:
+            _run_lite_mode("script.py", [])
+        except SystemExit as e:
+            exit_codes.append(e.code)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+
+    assert exit_codes == [1]
+    captured = capsys.readouterr()
+    assert "must be started from the main thread" in captured.err
+    assert "Armed and ready" not in captured.out
+    mock_get_user_and_host.assert_not_called()
+
+
+def test_fqdn_lookup_timeout_is_not_cached(monkeypatch):
+    """
+    Tests that a DNS lookup that times out falls back to the short name for that
+    call only, and that later calls pick up the lookup's result once it finishes.
+    """
+    import threading
+    from remote_debug import api
+
+    monkeypatch.setattr(api, "_fqdn_lookups", {})
+    monkeypatch.setattr(api, "FQDN_LOOKUP_TIMEOUT", 0.05)
+    monkeypatch.delenv("HOSTNAME", raising=False)
+    dns_answered = threading.Event()
+
+    def slow_getfqdn(name):
+        dns_answered.wait(5)
+        return f"{name}.cluster.edu"
+
+    with patch("socket.getfqdn", side_effect=slow_getfqdn) as mock_getfqdn:
+        assert api._cached_getfqdn("login1") == "login1"
+
+        dns_answered.set()
+        api._fqdn_lookups["login1"][0].join()
+        assert api._cached_getfqdn("login1") == "login1.cluster.edu"
+        assert api._cached_getfqdn("login1") == "login1.cluster.edu"
+
+    # The lookup that timed out was reused instead of being started again
+    mock_getfqdn.assert_called_once_with("login1")
+
+
+@pytest.fixture
+def host_env(monkeypatch):
+    """Start each host resolution test with no cached lookups or host variables."""
+    from remote_debug import api
+
+    monkeypatch.setattr(api, "_fqdn_lookups", {})
+    for name in ("HOSTNAME", "REMOTE_DEBUG_FQDN", "SLURM_JOB_USER"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("USER", "me")
+    monkeypatch.setenv("SLURM_SUBMIT_HOST", "login1")
+    return monkeypatch
+
+
+@patch("socket.getfqdn", return_value="login1.cluster.edu")
+def test_remote_debug_fqdn_overrides_lookup(mock_getfqdn, host_env):
+    """
+    Tests that REMOTE_DEBUG_FQDN is used as the login host without any DNS lookup.
+    """
+    from remote_debug.api import _get_ssh_command
+    from remote_debug.cli import _get_user_and_host
+
+    host_env.setenv("REMOTE_DEBUG_FQDN", "login.example.org")
+
+    assert _get_user_and_host() == ("me", "login.example.org")
+    assert _get_ssh_command("node7", 5679) == (
+        "ssh -N -L 5678:node7:5679 me@login.example.org"
+    )
+    mock_getfqdn.assert_not_called()
+
+
+def test_getfqdn_result_is_cached_and_deduplicated(host_env):
+    """
+    Tests that the FQDN is looked up once per host, and that a doubled hostname
+    is only shortened when the repeated name is a whole label.
+    """
+    from remote_debug.api import _cached_getfqdn
+
+    with patch("socket.getfqdn", return_value="login1.login1.cluster.edu") as mock:
+        assert _cached_getfqdn("login1") == "login1.cluster.edu"
+        assert _cached_getfqdn("login1") == "login1.cluster.edu"
+    mock.assert_called_once_with("login1")
+
+    with patch("socket.getfqdn", return_value="login.login.cluster.edu"):
+        assert _cached_getfqdn("login") == "login.cluster.edu"
+    with patch("socket.getfqdn", return_value="node1.node10.cluster.edu"):
+        assert _cached_getfqdn("node1") == "node1.node10.cluster.edu"
+
+
+@patch("socket.getfqdn", return_value="login1.cluster.edu")
+def test_hostname_variable_skips_lookup(mock_getfqdn, host_env):
+    """
+    Tests that $HOSTNAME is used as the FQDN only when it extends the short name.
+    """
+    from remote_debug.api import _cached_getfqdn
+
+    host_env.setenv("HOSTNAME", "login1.hpc.example.org")
+    assert _cached_getfqdn("login1") == "login1.hpc.example.org"
+    mock_getfqdn.assert_not_called()
+
+    host_env.setenv("HOSTNAME", "login10.hpc.example.org")
+    assert _cached_getfqdn("login1") == "login1.cluster.edu"
+    mock_getfqdn.assert_called_once_with("login1")
+
+
+def test_getfqdn_times_out_to_short_name(host_env):
+    """
+    Tests that a hanging DNS lookup falls back to the short name after
+    FQDN_LOOKUP_TIMEOUT, both for the lookup and the SSH tunnel command.
+    """
+    import threading
+    from remote_debug import api
+
+    host_env.setattr(api, "FQDN_LOOKUP_TIMEOUT", 0.05)
+    release = threading.Event()
+
+    def hanging_getfqdn(name):
+        release.wait(5)
+        return f"{name}.cluster.edu"
+
+    try:
+        with patch("socket.getfqdn", side_effect=hanging_getfqdn):
+            assert api._cached_getfqdn("login1") == "login1"
+            assert api._get_ssh_command("node7", 5679) == (
+                "ssh -N -L 5678:node7:5679 me@login1"
+            )
+    finally:
+        release.set()